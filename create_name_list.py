@@ -12,30 +12,19 @@ raw_data = "al’Absi, Mustafaal’Absi, MustafaAnker, JustinBishop, JeffreyBish
 # [A-Z][a-z’\-]+,  : Matches the start of the next Last Name (uppercase letter followed by lowercase/apostrophe/hyphen) and a comma.
 # |$                : OR matches the end of the string ($).
 # This lookahead helps separate concatenated names correctly.
-pattern = r"([A-Za-z’\-]+),\s*([A-Za-z.\- ]+?)(?=[A-Z][a-z’\-]+,|$)"
-
-# Find all occurrences matching the pattern in the raw data
-matches = re.findall(pattern, raw_data)
-
-# Initialize an empty list to store the name tuples (including duplicates initially)
-name_list_with_duplicates = []
-
-# Process each match found by the regex
-for last_name, first_name in matches:
-    # Strip leading/trailing whitespace from both names
-    clean_last_name = last_name.strip()
-    clean_first_name = first_name.strip()
-    # Create a tuple and append it to the list
-    name_list_with_duplicates.append((clean_last_name, clean_first_name))
-
-# --- Remove duplicates while preserving order ---
-unique_name_list = []
-seen_names = set() # Keep track of names already added
-
-for name_tuple in name_list_with_duplicates:
-    if name_tuple not in seen_names:
-        unique_name_list.append(name_tuple)
-        seen_names.add(name_tuple)
+# Note: the stdlib re engine is used on purpose. DFA engines such as RE2 or
+# Hyperscan would give linear-time scanning, but neither supports lookahead,
+# which this pattern needs to find where a first name ends and the next last
+# name begins.
+_NAME_RE = re.compile(r"([A-Za-z’\-]+),\s*([A-Za-z.\- ]+?)(?=[A-Z][a-z’\-]+,|$)")
+
+# --- Extract names and remove duplicates while preserving order ---
+# Matches are streamed with finditer into a dict keyed on the (last, first)
+# tuple; dicts keep insertion order, so the first occurrence of each name wins.
+unique_name_list = list({
+    (match.group(1).strip(), match.group(2).strip()): None # Strip leading/trailing whitespace
+    for match in _NAME_RE.finditer(raw_data)
+})
 # --- End of duplicate removal ---
 
 # Print the resulting list of unique tuples
@@ -8,10 +8,14 @@ and prints details ONLY for currently active or future grants (where the
 project end date is later than the current date). Details include grant number,
 award amount, and project start/end dates.
 """
+import concurrent.futures
 import csv
+import sys
 import requests
-import json
-from datetime import datetime, date
+import requests_cache
+import orjson
+from datetime import date
+from urllib3.util.retry import Retry
 
 # API endpoint for project search
 API_URL = "https://api.reporter.nih.gov/v2/projects/search"
@@ -22,6 +26,48 @@ HEADERS = {
     'Accept': 'application/json'
 }
 
+# Grants must have a project end date on or after this date to be shown
+PROJECT_END_CUTOFF = date(2026, 1, 1)
+
+# Column order of the output csv file, matching the keys built in display_funding_info
+CSV_FIELDS = [
+    "grant_num", "pi_name", "title", "org_name", "fy", "award_amount",
+    "start_date", "end_date", "budget_start", "budget_end"
+]
+
+# Number of result pages to fetch concurrently from the API
+MAX_WORKERS = 8
+
+# How long cached API responses are reused before querying again (seconds)
+CACHE_EXPIRE_AFTER = 86400
+
+# Shared session so every API request reuses the same keep-alive connection
+# to api.reporter.nih.gov instead of redoing the TCP + TLS handshake.
+# Responses are cached on disk, keyed on the request body, so re-running the
+# script within CACHE_EXPIRE_AFTER does not hit the API again. POST has to be
+# allowed explicitly because RePORTER searches are POST requests.
+_SESSION = requests_cache.CachedSession(
+    'nih_reporter_cache',
+    backend='sqlite',
+    expire_after=CACHE_EXPIRE_AFTER,
+    allowable_methods=('GET', 'POST'),
+    match_headers=False
+)
+_SESSION.headers.update(HEADERS)
+# Retry transient failures (rate limiting, server errors, dropped connections)
+# with exponential backoff instead of losing that page of results
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset(["POST"]),
+    respect_retry_after_header=True,
+    # return the last response once retries run out so raise_for_status()
+    # raises HTTPError with the API's error body attached
+    raise_on_status=False
+)
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(max_retries=_RETRY, pool_connections=4, pool_maxsize=MAX_WORKERS))
+
 def format_date(date_str):
     """
     Formats a date string from 'YYYY-MM-DDTHH:mm:ssZ' to 'MM/DD/YYYY'.
@@ -29,13 +75,12 @@ def format_date(date_str):
     """
     if not date_str:
         return "N/A"
-    try:
-        # Parse the date string (ignoring the time part)
-        dt_obj = datetime.strptime(date_str.split('T')[0], '%Y-%m-%d')
-        return dt_obj.strftime('%m/%d/%Y')
-    except ValueError:
-        print(f"Warning: Could not parse date '{date_str}'. Displaying original.")
-        return date_str # Return original if format is unexpected
+    # The API always returns 'YYYY-MM-DD...' so rearrange the date part
+    # directly instead of parsing it with strptime
+    if len(date_str) >= 10 and date_str[4] == '-' and date_str[7] == '-':
+        return f"{date_str[5:7]}/{date_str[8:10]}/{date_str[0:4]}"
+    print(f"Warning: Could not parse date '{date_str}'. Displaying original.")
+    return date_str # Return original if format is unexpected
 
 def format_currency(amount):
     """
@@ -49,32 +94,29 @@ def format_currency(amount):
     except (ValueError, TypeError):
         return "N/A"
 
-def get_nih_funding(first_name, last_name, limit=50):
+def _build_payload(pi_names, offset, limit):
     """
-    Fetches NIH funding data for a given PI name.
+    Builds the search payload for the RePORTER projects endpoint.
 
     Args:
-        first_name (str): The first name of the Principal Investigator.
-        last_name (str): The last name of the Principal Investigator.
-        limit (int): The maximum number of records to retrieve (default 50).
-                     Note: The API might have its own maximum limit per request.
+        pi_names (list): A list of {"first_name": ..., "last_name": ...} dicts.
+        offset (int): The index of the first record to return.
+        limit (int): The maximum number of records to return.
 
     Returns:
-        list: A list of dictionaries, where each dictionary contains details
-              of a funded project. Returns an empty list if no projects are found
-              or an error occurs.
+        dict: The JSON payload for the API request.
     """
-    print(f"\nSearching for NIH grants for PI: {first_name} {last_name}...")
+    # Only grants that end after both today and the cutoff can pass the
+    # filter in display_funding_info, so let the API drop the rest
+    end_from = max(date.today(), PROJECT_END_CUTOFF)
 
-    # Construct the payload for the API request
-    payload = {
+    return {
         "criteria": {
-            "pi_names": [
-                {
-                    "first_name": first_name,
-                    "last_name": last_name,
-                }
-            ]
+            "pi_names": pi_names,
+            "project_end_date": {
+                "from_date": end_from.isoformat(),
+                "to_date": "2099-12-31"
+            }
         },
         "include_fields": [
             "ProjectNum",       # Grant Number
@@ -85,50 +127,148 @@ def get_nih_funding(first_name, last_name, limit=50):
             "BudgetEnd",        # Specific budget period end   <--- ADD THIS
             "ContactPiName",    # PI Name for verification
             "ProjectTitle",     # Title of the project
-            "Organization",     # Awardee institution details
+            "Organization",     # Awardee institution details (only org_name is kept)
             "FiscalYear"        # Fiscal Year of the specific record
         ],
-        "offset": 0,
+        "offset": offset,
         "limit": limit,
         "sort_field": "fiscal_year", # Sort by fiscal year
         "sort_order": "desc"         # Show most recent first
     }
 
+def _search_projects(payload):
+    """
+    Sends a search payload to the API and returns the decoded response.
+
+    Args:
+        payload (dict): The JSON payload for the API request.
+
+    Returns:
+        dict: The decoded JSON response, or None if an error occurs.
+    """
     try:
         # Send the POST request to the API
-        response = requests.post(API_URL, headers=HEADERS, json=payload, timeout=30)
+        # (the session already sends the JSON Content-Type header)
+        response = _SESSION.post(API_URL, data=orjson.dumps(payload), timeout=30)
 
         # Check if the request was successful
         response.raise_for_status()
 
-        # Parse the JSON response
-        data = response.json()
+        # Parse the JSON response; orjson is noticeably faster than the stdlib parser
+        data = orjson.loads(response.content)
 
-        # Check if 'results' key exists and has data
-        if "results" in data and data["results"]:
-            print(f"Found {len(data['results'])} grant records (limit was {limit}). Filtering for active grants...")
-            return data["results"]
-        else:
-            print("No matching NIH grant records found.")
-            return []
+        # Only the institution name is displayed, so drop the rest of the
+        # nested Organization record (the API cannot select sub-fields)
+        for grant in data.get("results") or []:
+            organization = grant.get("organization")
+            if organization:
+                grant["organization"] = {"org_name": organization.get("org_name", "N/A")}
+        return data
 
     except requests.exceptions.RequestException as e:
         print(f"An error occurred during the API request: {e}")
         if hasattr(e, 'response') and e.response is not None:
             try:
-                error_details = e.response.json()
-                print("API Error Details:", json.dumps(error_details, indent=2))
-            except json.JSONDecodeError:
+                error_details = orjson.loads(e.response.content)
+                print("API Error Details:", orjson.dumps(error_details, option=orjson.OPT_INDENT_2).decode())
+            except orjson.JSONDecodeError:
                 print("Could not parse error response from API.")
                 print("API Response Text:", e.response.text)
-        return []
-    except json.JSONDecodeError:
+        return None
+    except orjson.JSONDecodeError:
         print("Error decoding the JSON response from the API.")
-        return []
+        return None
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        return None
+
+def get_nih_funding(first_name, last_name, limit=50):
+    """
+    Fetches NIH funding data for a given PI name.
+
+    Args:
+        first_name (str): The first name of the Principal Investigator.
+        last_name (str): The last name of the Principal Investigator.
+        limit (int): The maximum number of records to retrieve (default 50).
+                     Note: The API might have its own maximum limit per request.
+
+    Returns:
+        list: A list of dictionaries, where each dictionary contains details
+              of a funded project. Returns an empty list if no projects are found
+              or an error occurs.
+    """
+    print(f"\nSearching for NIH grants for PI: {first_name} {last_name}...")
+
+    pi_names = [{"first_name": first_name, "last_name": last_name}]
+    data = _search_projects(_build_payload(pi_names, 0, limit))
+
+    # Check if 'results' key exists and has data
+    if data and data.get("results"):
+        print(f"Found {len(data['results'])} grant records (limit was {limit}). Filtering for active grants...")
+        return data["results"]
+    elif data is not None:
+        print("No matching NIH grant records found.")
+    return []
+
+def get_nih_funding_batch(pi_names, limit=500):
+    """
+    Fetches NIH funding data for several PIs with a single paginated search.
+
+    The first page is requested on its own to learn the total number of
+    matching records; any remaining pages are then fetched concurrently.
+
+    Args:
+        pi_names (list): A list of {"first_name": ..., "last_name": ...} dicts.
+        limit (int): The number of records to request per page (default 500,
+                     which is the maximum the API allows per request).
+
+    Returns:
+        list: A list of dictionaries, where each dictionary contains details
+              of a funded project. Returns an empty list if no projects are found
+              or an error occurs.
+    """
+    # The API ignores an empty pi_names list and would return every project
+    if not pi_names:
+        print("No matching NIH grant records found.")
+        return []
+
+    print(f"\nSearching for NIH grants for {len(pi_names)} PIs...")
+
+    data = _search_projects(_build_payload(pi_names, 0, limit))
+    if not data or not data.get("results"):
+        if data is not None:
+            print("No matching NIH grant records found.")
         return []
 
+    results = list(data["results"])
+    total = data.get("meta", {}).get("total", len(results))
+
+    # fetch the remaining pages concurrently; each one is an independent request
+    offsets = range(limit, total, limit)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pages = executor.map(lambda offset: _search_projects(_build_payload(pi_names, offset, limit)), offsets)
+        for page in pages:
+            if page and page.get("results"):
+                results.extend(page["results"])
+
+    # Pages are separate queries sorted only by fiscal year, which has many
+    # ties, so a record can show up on two pages; keep its first occurrence
+    if total > limit:
+        unique_results = []
+        seen_project_nums = set()
+        for grant in results:
+            project_num = grant.get("project_num")
+            if project_num is None or project_num not in seen_project_nums:
+                unique_results.append(grant)
+                seen_project_nums.add(project_num)
+        results = unique_results
+
+    if len(results) < total:
+        print(f"Warning: only {len(results)} of {total} grant records were retrieved; some pages failed or overlapped.")
+
+    print(f"Found {len(results)} of {total} grant records. Filtering for active grants...")
+    return results
+
 def display_funding_info(funding_data):
     """
     Filters and displays the funding information for active grants.
@@ -141,8 +281,7 @@ def display_funding_info(funding_data):
 
     today = date.today() # Get today's date for comparison
     one_year_ago = today.replace(year=today.year - 1) # Get the date one year ago
-    # create a cutoff date of 2026-01-01
-    cutoff_date = date(2026, 1, 1) # Set a cutoff date for filtering
+    cutoff_date = PROJECT_END_CUTOFF # Set a cutoff date for filtering
     active_grants = []
 
     # list of grants that are returned from the methods
@@ -157,8 +296,8 @@ def display_funding_info(funding_data):
         if end_date_str:
             try:
                 # Parse only the date part (YYYY-MM-DD)
-                budget_end_date = datetime.strptime(budget_end_str.split('T')[0], '%Y-%m-%d').date()
-                end_date = datetime.strptime(end_date_str.split('T')[0], '%Y-%m-%d').date()  # Ensure end_date is parsed
+                budget_end_date = date.fromisoformat(budget_end_str[:10])
+                end_date = date.fromisoformat(end_date_str[:10])  # Ensure end_date is parsed
                 # Keep the grant if its budget start date is today or later and end date is after cutoff
                 if budget_end_date > today and end_date >= cutoff_date:
                     active_grants.append(grant)
@@ -214,16 +353,18 @@ def display_funding_info(funding_data):
             "budget_end": budget_end
         }
         grant_list.append(grant_dict) # Append the dictionary to the list
-        # Print details for each grant record
-        print("-" * 25)
-        print(f"Grant Number: {grant_num}")
-        print(f"PI Name:      {pi_name}")
-        print(f"Title:        {title}")
-        print(f"Institution:  {org_name}")
-        print(f"Fiscal Year:  {fy}")
-        print(f"Award Amount: {formatted_amount} (for FY {fy})")
-        print(f"Project Start:{start_date}")
-        print(f"Project End:  {end_date}") # Display the end date
+        # Print details for each grant record with a single write
+        sys.stdout.write(
+            f"{'-' * 25}\n"
+            f"Grant Number: {grant_num}\n"
+            f"PI Name:      {pi_name}\n"
+            f"Title:        {title}\n"
+            f"Institution:  {org_name}\n"
+            f"Fiscal Year:  {fy}\n"
+            f"Award Amount: {formatted_amount} (for FY {fy})\n"
+            f"Project Start:{start_date}\n"
+            f"Project End:  {end_date}\n" # Display the end date
+        )
 
     print("\n--- End of Active Details ---")
     print("\nNote: Award amounts shown are typically for the specific fiscal year listed.")
@@ -255,44 +396,42 @@ if __name__ == "__main__":
 
     # print("\nScript finished.")
 
-piList = [('al’Absi', 'Mustafa'), ('Anker', 'Justin'), ('Bishop', 'Jeffrey'), ('Carroll', 'Dana'), ('Conelea', 'Christine'), ('Fair', 'Damien'), ('Gunlicks-Stoessel', 'Meredith'), ('Krueger', 'Robert'), ('Kummerfeld', 'Erich'), ('Kushner', 'Matt'), ('Lim', 'Kelvin'), ('Luciana', 'Monica'), ('McGue', 'Matthew'), ('McMorris', 'Barbara'), ('Peterson', 'Carol'), ('Piehler', 'Timothy'), ('Redish', 'A. David'), ('Rinehart', 'Linda'), ('Schallmo', 'Michael-Paul'), ('Specker', 'Sheila'), ('Sponheim', 'Scott'), ('Thomas', 'Mark'), ('Toomey', 'Traci'), ('Vrieze', 'Scott'), ('Widome', 'Rachel'), ('Wilson', 'Sylia')]
+# Initialize an empty list to store grant data
+grant_lists = []
 
-# read the piList from a csv file
+# read the PI names from a csv file straight into the batched search criteria
 with open('unique_names.csv', 'r') as f:
     # ignore the header row
     next(f)
-    reader = csv.reader(f)
-    piList = list(reader)
-
-# Initialize an empty list to store grant data
-
-# iterate through the list of tuples and call the function for each PI
-for pi in piList:
-    last_name, first_name = pi
-    print(f"\nFetching funding information for {first_name} {last_name}...")
-    grants = get_nih_funding(first_name, last_name)
-    grant_list = display_funding_info(grants) # This function now filters and displays
+    pi_names = [{"first_name": first_name, "last_name": last_name} for last_name, first_name in csv.reader(f)]
+
+# fetch the grants for every PI with one batched search instead of one request per PI
+if pi_names:
+    grants = get_nih_funding_batch(pi_names)
+else:
+    print("\nNo PI names found in unique_names.csv.")
+    grants = []
+
+# group the grant records by contact PI, keeping the order they were returned in
+grants_by_pi = {}
+for grant in grants:
+    grants_by_pi.setdefault(grant.get("contact_pi_name", "N/A"), []).append(grant)
+
+# iterate through the groups and display the results for each PI
+for pi_name, pi_grants in grants_by_pi.items():
+    print(f"\nFunding information for {pi_name}:")
+    grant_list = display_funding_info(pi_grants) # This function now filters and displays
     # concatenate the list of dictionaries into a single list
-
-    if 'grant_lists' not in locals():
-        grant_lists = grant_list
-    else:
-        if grant_list:
-            # Check if grant_list is not empty before extending
-            # concatenate the list of dictionaries into a single list   
-            grant_lists.extend(grant_list)
+    if grant_list:
+        grant_lists.extend(grant_list)
 
 # write the list of dictionaries to a csv file
-import pandas as pd
-
-
-df = pd.DataFrame(grant_lists)
-
-
 csv_file_name = 'nih_grant_funding.csv'
 
-
-df.to_csv(csv_file_name, index=False)
+with open(csv_file_name, 'w', newline='', encoding='utf-8') as f:
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(grant_lists)
 
 print(f"Grant funding information has been written to {csv_file_name}.")
 